@@ -1,15 +1,76 @@
 import pandas as pd
+import requests
+import csv
+import re
 import whois
 import os
+import sys
 import time
 import logging
+import threading
+import shelve
+import functools
+import itertools
+import importlib.util
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+# Use pyarrow's multi-threaded CSV parser when it is installed
+CSV_READ_ENGINE = 'pyarrow' if importlib.util.find_spec('pyarrow') else 'c'
+
+logger = logging.getLogger(__name__)
+
+# Source of the list of valid top-level domains
+IANA_TLDS_URL = 'https://data.iana.org/TLD/tlds-alpha-by-domain.txt'
+
+# How long a downloaded TLD list is used before it is downloaded again, in seconds
+TLD_LIST_MAX_AGE = 7 * 86400
+
+# WhoisXML API bulk WHOIS endpoints, used when WHOISXML_API_KEY is set
+BULK_WHOIS_URL = 'https://www.whoisxmlapi.com/BulkWhoisLookup/bulkServices/bulkWhois'
+BULK_WHOIS_RECORDS_URL = 'https://www.whoisxmlapi.com/BulkWhoisLookup/bulkServices/getRecords'
+
+# Number of domains sent per bulk WHOIS request
+BULK_WHOIS_BATCH_SIZE = 500
+
+# Seconds between polls for bulk WHOIS results, and how many polls to make
+BULK_WHOIS_POLL_INTERVAL = 5
+BULK_WHOIS_MAX_POLLS = 12
+
+# Hostname syntax: dot-separated labels of letters, digits and inner hyphens
+_DOMAIN_RE = re.compile(r'^[a-z0-9](?:[a-z0-9-]{0,61}[a-z0-9])?(?:\.[a-z0-9](?:[a-z0-9-]{0,61}[a-z0-9])?)+$')
+
+# Maximum number of concurrent WHOIS lookups against the same TLD
+MAX_LOOKUPS_PER_TLD = 4
+
+# Maximum number of WHOIS lookups started per second across all threads
+MAX_LOOKUPS_PER_SECOND = 10
+
+# Upper bound on the backoff between WHOIS retries, in seconds
+MAX_RETRY_WAIT = 60
+
+# How long a cached WHOIS result stays valid, in seconds
+WHOIS_CACHE_TTL = 7 * 86400
+
+_valid_tlds = None
+
+_whois_servers = {}
+
+_tld_semaphores = {}
+_tld_semaphores_lock = threading.Lock()
+
+_whois_cache = None
+_whois_cache_lock = threading.Lock()
+
+_lookup_times = deque(maxlen=MAX_LOOKUPS_PER_SECOND)
+_lookup_times_lock = threading.Lock()
 
 def load_dataframe(file_path):
     """
     Load a DataFrame from a CSV file if it exists; otherwise, return an empty DataFrame.
     """
     if os.path.exists(file_path):
-        return pd.read_csv(file_path)
+        return pd.read_csv(file_path, engine=CSV_READ_ENGINE)
     return pd.DataFrame(columns=['domain'])
 
 def save_dataframe(df, file_path):
@@ -18,150 +79,531 @@ def save_dataframe(df, file_path):
     """
     df.to_csv(file_path, index=False)
 
+def open_csv_for_append(file_path):
+    """
+    Open a CSV file in append mode, writing the header row if the file is new or empty.
+    """
+    write_header = not os.path.exists(file_path) or os.path.getsize(file_path) == 0
+    file = open(file_path, 'a', newline='')
+    if write_header:
+        csv.writer(file, lineterminator=os.linesep).writerow(['domain'])
+    return file
+
 def read_list_from_file(file_path):
     """
     Read lines from a text file and return a list, stripping whitespace.
     """
     try:
         with open(file_path, 'r') as file:
-            # Correctly read the file contents and split into lines
-            return [line.strip() for line in file.read().splitlines() if line.strip()]
+            # Strip each line as it is read and skip empty ones
+            return [line for line in map(str.strip, file) if line]
     except FileNotFoundError:
-        logging.error(f"File not found: {file_path}")
-        print(f"Error: The file {file_path} does not exist.")
+        logger.error("File not found: %s", file_path)
         return []
 
 def concatenate_domains(strings, extensions):
     """
     Concatenate each string with a dot and each extension to form full domain names.
+    Returns a generator, so the full list of combinations is never held in memory.
     """
-    return [f"{s}.{ext}" for s in strings for ext in extensions]
+    suffixes = [f".{ext}" for ext in extensions]
+    return (s + suffix for s in strings for suffix in suffixes)
 
-def is_domain_available(domain, attempt=1, max_attempts=5):
+def parse_tld_list(text):
     """
-    Check if a domain is available using the whois library.
-    Implements exponential backoff on failure.
+    Parse the IANA list of top-level domains into a set of lowercase TLDs.
+    Returns None if the text does not look like the list, e.g. an HTML page served by a proxy.
+    """
+    lines = [line for line in map(str.strip, text.splitlines()) if line]
+    if not lines or not lines[0].startswith('# Version'):
+        return None
+    tlds = frozenset(line.lower() for line in lines[1:] if not line.startswith('#'))
+    return tlds if 'com' in tlds else None
+
+def load_valid_tlds(file_path):
+    """
+    Load the IANA list of top-level domains, downloading it to file_path if it is missing or older than TLD_LIST_MAX_AGE.
+    If no valid list can be obtained, only the domain syntax is validated.
+    """
+    global _valid_tlds
+    _valid_tlds = None
+    if not os.path.exists(file_path) or time.time() - os.path.getmtime(file_path) > TLD_LIST_MAX_AGE:
+        try:
+            response = requests.get(IANA_TLDS_URL, timeout=30)
+            response.raise_for_status()
+        except requests.RequestException as e:
+            logger.warning("Could not download the TLD list: %s", e)
+        else:
+            # Only replace the file with something that looks like the list
+            if parse_tld_list(response.text) is None:
+                logger.warning("Downloaded TLD list is not in the expected format. Ignoring it.")
+            else:
+                with open(file_path, 'w') as file:
+                    file.write(response.text)
+                logger.info("Downloaded the TLD list to %s", file_path)
+    if not os.path.exists(file_path):
+        logger.warning("No TLD list available. Skipping TLD validation.")
+        return
+    with open(file_path, 'r') as file:
+        tlds = parse_tld_list(file.read())
+    if tlds is None:
+        logger.warning("TLD list %s is not in the expected format. Skipping TLD validation.", file_path)
+        return
+    _valid_tlds = tlds
+
+def is_valid_domain(domain):
+    """
+    Check whether a domain is syntactically valid and, if the TLD list is loaded, has a known TLD.
     """
     try:
-        w = whois.whois(domain)
-        # Handle different formats of 'domain_name'
-        if isinstance(w.domain_name, list):
-            return not any(w.domain_name)
-        return w.domain_name is None or w.domain_name == ''
-    except whois.parser.PywhoisError:
-        # Domain is available if a PywhoisError is raised
-        return True
-    except Exception as e:
-        if attempt <= max_attempts:
-            wait_time = 2 ** attempt
-            logging.warning(f"Error checking {domain}: {e}. Retrying in {wait_time} seconds (Attempt {attempt}/{max_attempts}).")
-            print(f"Warning: Error checking {domain}. Retrying in {wait_time} seconds (Attempt {attempt}/{max_attempts}).")
+        ascii_domain = domain.encode('idna').decode('ascii').lower()
+    except UnicodeError:
+        return False
+    if not _DOMAIN_RE.match(ascii_domain):
+        return False
+    return _valid_tlds is None or ascii_domain.rsplit('.', 1)[-1] in _valid_tlds
+
+def wait_for_rate_limit():
+    """
+    Block until another WHOIS lookup can start without exceeding MAX_LOOKUPS_PER_SECOND.
+    """
+    with _lookup_times_lock:
+        if len(_lookup_times) == _lookup_times.maxlen:
+            elapsed = time.monotonic() - _lookup_times[0]
+            if elapsed < 1.0:
+                time.sleep(1.0 - elapsed)
+        _lookup_times.append(time.monotonic())
+
+def open_whois_cache(file_path):
+    """
+    Open the on-disk WHOIS result cache used by is_domain_available.
+    """
+    global _whois_cache
+    _whois_cache = shelve.open(file_path)
+    return _whois_cache
+
+def close_whois_cache():
+    """
+    Close the WHOIS result cache if it is open.
+    """
+    global _whois_cache
+    if _whois_cache is not None:
+        _whois_cache.close()
+        _whois_cache = None
+
+def cache_key(domain):
+    """
+    Normalise a domain for use as a key in the WHOIS result cache, so differently cased inputs share an entry.
+    """
+    return domain.lower()
+
+def get_cached_result(domain):
+    """
+    Return the cached availability of a domain, or None if the cache is closed or has no fresh entry.
+    """
+    if _whois_cache is None:
+        return None
+    with _whois_cache_lock:
+        entry = _whois_cache.get(cache_key(domain))
+    if entry is not None and time.time() - entry['ts'] < WHOIS_CACHE_TTL:
+        return entry['available']
+    return None
+
+def store_cached_result(domain, available):
+    """
+    Record the availability of a domain in the cache if it is open.
+    """
+    with _whois_cache_lock:
+        if _whois_cache is not None:
+            _whois_cache[cache_key(domain)] = {'available': available, 'ts': time.time()}
+
+def cache_whois_result(func):
+    """
+    Cache availability results by domain for WHOIS_CACHE_TTL seconds.
+    A result of None means the lookup failed and is never cached.
+    Calls pass straight through when the cache has not been opened.
+    """
+    @functools.wraps(func)
+    def wrapper(domain, *args, **kwargs):
+        if _whois_cache is None:
+            return func(domain, *args, **kwargs)
+        available = get_cached_result(domain)
+        if available is not None:
+            return available
+        available = func(domain, *args, **kwargs)
+        if available is not None:
+            store_cached_result(domain, available)
+        return available
+    return wrapper
+
+def get_whois_server(domain):
+    """
+    Return the registry WHOIS server for the domain's extension.
+    The server is looked up once per extension, which for most TLDs saves a query to whois.iana.org per domain.
+    """
+    extension = domain.split('.', 1)[-1]
+    server = _whois_servers.get(extension)
+    if server is None:
+        # Resolve without holding a lock, since choose_server may query whois.iana.org;
+        # setdefault keeps the first answer if several threads resolve the same extension
+        server = _whois_servers.setdefault(extension, whois.NICClient().choose_server(domain))
+    return server
+
+def lookup_whois(domain):
+    """
+    Query the registry WHOIS server for a domain and parse the response.
+    Raises whois.parser.PywhoisError if the registry has no record of the domain.
+    """
+    ascii_domain = domain.encode('idna').decode('ascii')
+    # Flags of 0 skip the follow-up query to the registrar's WHOIS server,
+    # which only adds contact details the availability check does not use
+    text = whois.NICClient().whois(ascii_domain, get_whois_server(ascii_domain), 0, quiet=True)
+    # NICClient reports socket errors in the response text, and throttled registries may answer with nothing;
+    # raise so the lookup is retried instead of the empty record reading as available
+    if not text.strip():
+        raise ConnectionError(f"Empty WHOIS response for {domain}")
+    if text.startswith('Socket not responding'):
+        raise ConnectionError(text)
+    return whois.WhoisEntry.load(domain, text)
+
+@cache_whois_result
+def lookup_availability(domain, max_attempts=5):
+    """
+    Check if a domain is available using the whois library.
+    Invalid domains are reported as unavailable without a lookup.
+    Implements exponential backoff on failure and returns None if every attempt fails.
+    """
+    if not is_valid_domain(domain):
+        logger.warning("Invalid domain: %s", domain)
+        return False
+    
+    attempt = 1
+    while True:
+        try:
+            wait_for_rate_limit()
+            w = lookup_whois(domain)
+            # Handle different formats of 'domain_name'
+            if isinstance(w.domain_name, list):
+                return not any(w.domain_name)
+            return w.domain_name is None or w.domain_name == ''
+        except whois.parser.PywhoisError:
+            # Domain is available if a PywhoisError is raised
+            return True
+        except Exception as e:
+            if attempt > max_attempts:
+                logger.error("Failed to check %s after %d attempts.", domain, max_attempts)
+                return None
+            wait_time = min(2 ** attempt, MAX_RETRY_WAIT)
+            logger.warning(
+                "Error checking %s: %s. Retrying in %d seconds (Attempt %d/%d).",
+                domain, e, wait_time, attempt, max_attempts
+            )
             time.sleep(wait_time)
-            return is_domain_available(domain, attempt + 1, max_attempts)
+            attempt += 1
+
+def is_domain_available(domain, max_attempts=5):
+    """
+    Check if a domain is available, reusing cached results.
+    A domain whose lookup failed is reported as unavailable.
+    """
+    return lookup_availability(domain, max_attempts) is True
+
+def is_domain_available_bulk(domains, api_key):
+    """
+    Check the availability of a batch of domains with the WhoisXML bulk WHOIS API.
+    Cached and invalid domains are not sent. Domains the API has not answered are returned as None.
+    """
+    results = {}
+    to_send = []
+    for domain in domains:
+        available = get_cached_result(domain)
+        if available is not None:
+            results[cache_key(domain)] = available
+        elif not is_valid_domain(domain):
+            logger.warning("Invalid domain: %s", domain)
+            results[cache_key(domain)] = False
         else:
-            logging.error(f"Failed to check {domain} after {max_attempts} attempts.")
-            print(f"Error: Failed to check {domain} after {max_attempts} attempts.")
-            return False
+            to_send.append(domain)
+
+    if to_send:
+        try:
+            response = requests.post(
+                BULK_WHOIS_URL,
+                json={'apiKey': api_key, 'domains': to_send, 'outputFormat': 'JSON'},
+                timeout=60
+            )
+            response.raise_for_status()
+            request_id = response.json()['requestId']
+            # Poll until every domain has been processed or the attempts run out
+            records = []
+            for _ in range(BULK_WHOIS_MAX_POLLS):
+                time.sleep(BULK_WHOIS_POLL_INTERVAL)
+                response = requests.post(
+                    BULK_WHOIS_RECORDS_URL,
+                    json={'apiKey': api_key, 'requestId': request_id, 'maxRecords': len(to_send),
+                          'startIndex': 1, 'outputFormat': 'JSON'},
+                    timeout=60
+                )
+                response.raise_for_status()
+                data = response.json()
+                records = data.get('whoisRecords', [])
+                if data.get('recordsLeft') == 0:
+                    break
+        except (requests.RequestException, KeyError, ValueError) as e:
+            logger.warning("Bulk WHOIS request failed: %s. Checking %d domains individually.", e, len(to_send))
+            records = []
+        for record in records:
+            domain = record.get('domainName')
+            whois_record = record.get('whoisRecord')
+            if not domain or whois_record is None:
+                continue
+            # The API reports MISSING_WHOIS_DATA when the registry has no record of the domain
+            available = whois_record.get('dataError') == 'MISSING_WHOIS_DATA'
+            results[cache_key(domain)] = available
+            store_cached_result(domain, available)
 
-def update_dataframes(domain, available_df, unavailable_df):
+    return [results.get(cache_key(d)) for d in domains]
+
+def get_tld_semaphore(domain):
+    """
+    Return the semaphore limiting concurrent lookups for the domain's TLD.
     """
-    Check domain availability and update the appropriate DataFrame.
+    tld = domain.rsplit('.', 1)[-1]
+    with _tld_semaphores_lock:
+        if tld not in _tld_semaphores:
+            _tld_semaphores[tld] = threading.Semaphore(MAX_LOOKUPS_PER_TLD)
+        return _tld_semaphores[tld]
+
+def log_availability(domain, available):
     """
-    if is_domain_available(domain):
-        # Use pd.concat instead of deprecated append
-        available_df = pd.concat([available_df, pd.DataFrame({'domain': [domain]})], ignore_index=True)
-        logging.info(f"Available: {domain}")
-        print(f"Available: {domain}")
+    Log whether a domain is available.
+    """
+    if available:
+        logger.info("Available: %s", domain)
     else:
-        unavailable_df = pd.concat([unavailable_df, pd.DataFrame({'domain': [domain]})], ignore_index=True)
-        logging.info(f"Unavailable: {domain}")
-        print(f"Unavailable: {domain}")
-    return available_df, unavailable_df
+        logger.info("Unavailable: %s", domain)
+
+def classify_domain(domain):
+    """
+    Check domain availability and log the result.
+    Returns True if the domain is available, False otherwise.
+    """
+    with get_tld_semaphore(domain):
+        available = is_domain_available(domain)
+    log_availability(domain, available)
+    return available
+
+def chunked(iterable, size):
+    """
+    Yield successive lists of up to size items from an iterable.
+    """
+    iterator = iter(iterable)
+    while batch := list(itertools.islice(iterator, size)):
+        yield batch
+
+def classify_domains(domains, executor, window_size):
+    """
+    Classify domains on the executor, keeping at most window_size lookups in flight.
+    A new domain is submitted each time the oldest result is yielded, so one slow lookup does not idle the other workers.
+    Yields (domain, available) pairs in input order.
+    """
+    in_flight = deque()
+    for domain in domains:
+        in_flight.append((domain, executor.submit(classify_domain, domain)))
+        if len(in_flight) >= window_size:
+            oldest, future = in_flight.popleft()
+            yield oldest, future.result()
+    while in_flight:
+        oldest, future = in_flight.popleft()
+        yield oldest, future.result()
+
+def classify_domains_bulk(domains, api_key, executor):
+    """
+    Check domains in batches of BULK_WHOIS_BATCH_SIZE with the bulk WHOIS API, logging each result.
+    Domains the API has not answered are classified individually on the executor.
+    Yields (domain, available) pairs in input order.
+    """
+    for batch in chunked(domains, BULK_WHOIS_BATCH_SIZE):
+        results = is_domain_available_bulk(batch, api_key)
+        leftovers = [d for d, available in zip(batch, results) if available is None]
+        fallback = dict(zip(leftovers, executor.map(classify_domain, leftovers)))
+        for domain, available in zip(batch, results):
+            if available is None:
+                # Already logged by classify_domain
+                yield domain, fallback[domain]
+            else:
+                log_availability(domain, available)
+                yield domain, available
+
+def open_processed_domains(file_path, available_file, unavailable_file):
+    """
+    Open the persistent record of processed domains, mapping each domain to its status.
+    The CSV files take precedence: the record is rebuilt from them when it is empty or when either file is missing,
+    so domains whose file was deleted are checked again.
+    """
+    processed = shelve.open(file_path)
+    if len(processed) == 0 or not os.path.exists(available_file) or not os.path.exists(unavailable_file):
+        processed.clear()
+        for status, df in (('available', load_dataframe(available_file)),
+                           ('unavailable', load_dataframe(unavailable_file))):
+            for domain in df['domain'].tolist():
+                processed[domain] = status
+        processed.sync()
+    return processed
+
+def filter_unprocessed(domains, processed):
+    """
+    Lazily yield the domains that are not in processed, in their original order.
+    """
+    return (d for d in domains if d not in processed)
 
 def sort_and_save_dataframes(available_df, unavailable_df, available_file, unavailable_file):
     """
     Sort the DataFrames alphabetically by the 'domain' column and save them.
     """
-    # Sort DataFrames
-    available_df_sorted = available_df.sort_values(by='domain').reset_index(drop=True)
-    unavailable_df_sorted = unavailable_df.sort_values(by='domain').reset_index(drop=True)
+    # Sort the single string column as a plain list, avoiding pandas' sort and index reset
+    available_df_sorted = pd.DataFrame({'domain': sorted(available_df['domain'].tolist())})
+    unavailable_df_sorted = pd.DataFrame({'domain': sorted(unavailable_df['domain'].tolist())})
     
     # Save sorted DataFrames
     save_dataframe(available_df_sorted, available_file)
     save_dataframe(unavailable_df_sorted, unavailable_file)
     
-    logging.info("Sorted and saved available_domains.csv and unavailable_domains.csv.")
-    print("Sorted and saved available_domains.csv and unavailable_domains.csv.")
+    logger.info("Sorted and saved available_domains.csv and unavailable_domains.csv.")
+
+def finalize_csv_files(available_file, unavailable_file, only_if_needed=False):
+    """
+    Read back the CSV files, drop rows repeated after an interrupted run, then sort and save them.
+    With only_if_needed, files that are already sorted and free of duplicates are left untouched.
+    """
+    available_df = load_dataframe(available_file)
+    unavailable_df = load_dataframe(unavailable_file)
+    if only_if_needed and all(
+        df['domain'].is_unique and df['domain'].is_monotonic_increasing
+        for df in (available_df, unavailable_df)
+    ):
+        return False
+    sort_and_save_dataframes(
+        available_df.drop_duplicates(), unavailable_df.drop_duplicates(), available_file, unavailable_file
+    )
+    return True
 
 def main():
     """
     Main function to process domain availability.
     """
-    # Configure logging
+    # Ensure data folder exists before the log file is opened in it
+    data_folder = 'data'
+    os.makedirs(data_folder, exist_ok=True)
+    
+    # Configure logging to both the log file and the console
     logging.basicConfig(
-        filename='data/domain_checker.log',
+        handlers=[logging.FileHandler(os.path.join(data_folder, 'domain_checker.log')), logging.StreamHandler(sys.stdout)],
         level=logging.INFO,
         format='%(asctime)s - %(levelname)s - %(message)s'
     )
     
     # Define file paths
-    data_folder = 'data'
     available_file = os.path.join(data_folder, 'available_domains.csv')
     unavailable_file = os.path.join(data_folder, 'unavailable_domains.csv')
     domain_names_file = os.path.join(data_folder, 'domain_names.txt')
     extensions_file = os.path.join(data_folder, 'extensions.txt')
-    
-    # Ensure data folder exists
-    if not os.path.exists(data_folder):
-        os.makedirs(data_folder)
-        logging.info(f"Created data folder at {data_folder}")
-    
-    # Load existing DataFrames
-    available_df = load_dataframe(available_file)
-    unavailable_df = load_dataframe(unavailable_file)
+    whois_cache_file = os.path.join(data_folder, 'whois_cache.db')
+    processed_file = os.path.join(data_folder, 'processed.shelf')
+    tlds_file = os.path.join(data_folder, 'tlds-alpha-by-domain.txt')
     
     # Read domain names and extensions from files
     domain_names = read_list_from_file(domain_names_file)
     extensions = read_list_from_file(extensions_file)
     
     if not domain_names or not extensions:
-        logging.error("Domain names or extensions list is empty. Exiting.")
-        print("Error: Domain names or extensions list is empty. Please check the input files.")
+        logger.error("Domain names or extensions list is empty. Exiting.")
         return
     
-    # Concatenate to form full domains
-    all_domains = concatenate_domains(domain_names, extensions)
-    
-    # Combine processed domains to avoid repetition
-    processed_domains = set(available_df['domain']).union(set(unavailable_df['domain']))
-    
-    # Filter out already processed domains
-    domains_to_check = [d for d in all_domains if d not in processed_domains]
-    
-    print(f"Total domains to check: {len(domains_to_check)}")
-    logging.info(f"Total domains to check: {len(domains_to_check)}")
+    # Load the record of processed domains to avoid repetition
+    processed_domains = open_processed_domains(processed_file, available_file, unavailable_file)
     
-    # Define sleep time in seconds
-    sleep_time = 1  # Adjust as needed (e.g., 1 second between requests)
+    # Statuses waiting to be recorded once their CSV rows are flushed
+    pending = []
     
-    # Iterate and check each domain
-    for index, domain in enumerate(domains_to_check, start=1):
-        available_df, unavailable_df = update_dataframes(domain, available_df, unavailable_df)
+    # Record pending statuses and close both shelves even if the run is interrupted
+    try:
+        # Count the domains to check in a first pass, so progress can be reported without holding them in memory
+        total = sum(1 for _ in filter_unprocessed(concatenate_domains(domain_names, extensions), processed_domains))
+        logger.info("Total domains to check: %d", total)
+        
+        # Nothing new to check; still finish a previous run that stopped before sorting
+        if not total:
+            logger.info("All domains have already been checked.")
+            finalize_csv_files(available_file, unavailable_file, only_if_needed=True)
+            return
+        
+        # Concatenate to form full domains and filter out already processed ones as they are checked
+        domains_to_check = filter_unprocessed(concatenate_domains(domain_names, extensions), processed_domains)
+        
+        # Load the TLD list used to reject invalid domains without a lookup
+        load_valid_tlds(tlds_file)
+        
+        # Reuse WHOIS results from previous runs
+        open_whois_cache(whois_cache_file)
+        
+        # Use the WhoisXML bulk WHOIS API when an API key is provided
+        api_key = os.environ.get('WHOISXML_API_KEY')
+        
+        # Number of concurrent WHOIS lookups
+        max_workers = 16
         
-        # Save DataFrames after each iteration
-        save_dataframe(available_df, available_file)
-        save_dataframe(unavailable_df, unavailable_file)
+        # Maximum number of domains submitted to the thread pool but not yet written
+        window_size = 256
         
-        # Log and print progress
-        logging.info(f"Checked {index}/{len(domains_to_check)} domains. Sleeping for {sleep_time} second(s).")
-        print(f"Checked {index}/{len(domains_to_check)} domains. Sleeping for {sleep_time} second(s).")
+        # Number of domains to check between flushes to disk
+        flush_interval = 50
         
-        # Sleep to respect rate limits
-        time.sleep(sleep_time)
+        # Append newly classified domains to the CSV files instead of rewriting them;
+        # closing the files on the way out also flushes any pending rows before they are recorded
+        with open_csv_for_append(available_file) as available_fh, open_csv_for_append(unavailable_file) as unavailable_fh:
+            # Match the line terminator used by pandas' to_csv
+            available_writer = csv.writer(available_fh, lineterminator=os.linesep)
+            unavailable_writer = csv.writer(unavailable_fh, lineterminator=os.linesep)
+            
+            # Check domains with the bulk API if a key is set, otherwise concurrently;
+            # results are written from this thread in input order
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                try:
+                    if api_key:
+                        results = classify_domains_bulk(domains_to_check, api_key, executor)
+                    else:
+                        results = classify_domains(domains_to_check, executor, window_size)
+                    for index, (domain, available) in enumerate(results, start=1):
+                        if available:
+                            available_writer.writerow([domain])
+                            pending.append((domain, 'available'))
+                        else:
+                            unavailable_writer.writerow([domain])
+                            pending.append((domain, 'unavailable'))
+                        
+                        # Flush CSV files every flush_interval domains, then record them as processed
+                        if index % flush_interval == 0:
+                            available_fh.flush()
+                            unavailable_fh.flush()
+                            processed_domains.update(pending)
+                            processed_domains.sync()
+                            pending = []
+                        
+                        # Log progress
+                        logger.info("Checked %d/%d domains.", index, total)
+                except BaseException:
+                    # Stopping early: drop queued lookups instead of waiting for them
+                    executor.shutdown(wait=False, cancel_futures=True)
+                    raise
+    finally:
+        processed_domains.update(pending)
+        processed_domains.close()
+        close_whois_cache()
     
-    # Sort and save the final DataFrames
-    sort_and_save_dataframes(available_df, unavailable_df, available_file, unavailable_file)
-    print("Domain checking completed and CSV files have been sorted.")
+    # Read back, dedupe, sort and save the appended CSV files
+    finalize_csv_files(available_file, unavailable_file)
+    logger.info("Domain checking completed and CSV files have been sorted.")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
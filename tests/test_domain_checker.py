@@ -2,16 +2,39 @@ import pytest
 from unittest import mock
 from unittest.mock import mock_open, patch, MagicMock
 import os
+import time
+import threading
+import shelve
 import pandas as pd
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from src.domain_checker import (
     load_dataframe,
     save_dataframe,
     read_list_from_file,
     concatenate_domains,
+    load_valid_tlds,
+    is_valid_domain,
+    get_whois_server,
+    lookup_whois,
     is_domain_available,
-    update_dataframes,
-    sort_and_save_dataframes
+    is_domain_available_bulk,
+    wait_for_rate_limit,
+    open_whois_cache,
+    close_whois_cache,
+    get_tld_semaphore,
+    classify_domain,
+    open_csv_for_append,
+    open_processed_domains,
+    filter_unprocessed,
+    chunked,
+    classify_domains,
+    classify_domains_bulk,
+    sort_and_save_dataframes,
+    finalize_csv_files,
+    main
 )
+import requests
 import whois  # Added import to fix NameError
 
 # Helper function to create a DataFrame for testing
@@ -19,24 +42,48 @@ def create_dataframe(domains):
     return pd.DataFrame({'domain': domains})
 
 @pytest.fixture
-def mock_logging():
-    with patch('src.domain_checker.logging') as mock_log:
+def mock_logger():
+    with patch('src.domain_checker.logger') as mock_log:
         yield mock_log
 
 @pytest.fixture
 def mock_whois():
-    with patch('src.domain_checker.whois.whois') as mock_whois:
+    with patch('src.domain_checker.lookup_whois') as mock_whois:
         yield mock_whois
 
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch, mock_whois):
+    # Run main in a scratch directory with the input lists and TLD list in place,
+    # where only .com names starting with 'shop' are available
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.delenv('WHOISXML_API_KEY', raising=False)
+    monkeypatch.setattr('src.domain_checker._valid_tlds', None)
+    monkeypatch.setattr('src.domain_checker.logging.basicConfig', MagicMock())
+    monkeypatch.setattr('src.domain_checker.wait_for_rate_limit', MagicMock())
+    data = tmp_path / 'data'
+    data.mkdir()
+    (data / 'domain_names.txt').write_text("shop\nmy\n")
+    (data / 'extensions.txt').write_text("com\nnet\n")
+    (data / 'tlds-alpha-by-domain.txt').write_text("# Version 2024101500, Last Updated Tue Oct 15 07:07:01 2024 UTC\nCOM\nNET\n")
+    def fake_whois(domain):
+        if domain.startswith('shop') and domain.endswith('.com'):
+            raise whois.parser.PywhoisError
+        return MagicMock(domain_name=domain)
+    mock_whois.side_effect = fake_whois
+    return data
+
+def read_domains(file_path):
+    return pd.read_csv(file_path)['domain'].tolist()
+
 # 1. Test handling missing input files
-def test_read_list_from_file_missing_file(mock_logging):
+def test_read_list_from_file_missing_file(mock_logger):
     # Attempt to read a non-existent file
     result = read_list_from_file('data/non_existent_file.txt')
     assert result == []
-    mock_logging.error.assert_called_with("File not found: data/non_existent_file.txt")
+    mock_logger.error.assert_called_with("File not found: %s", "data/non_existent_file.txt")
 
 # 2. Test reading files with different names
-def test_read_list_from_file_different_names(mock_logging):
+def test_read_list_from_file_different_names(mock_logger):
     # Mock file content for a differently named file
     with patch('builtins.open', mock_open(read_data="shop\n my \nbest\nsuper")) as mock_file:
         result = read_list_from_file('data/custom_domain_names.txt')
@@ -44,7 +91,7 @@ def test_read_list_from_file_different_names(mock_logging):
         assert result == ['shop', 'my', 'best', 'super']
 
 # 3. Test handling trailing spaces and empty lines
-def test_read_list_from_file_trailing_spaces_and_empty_lines(mock_logging):
+def test_read_list_from_file_trailing_spaces_and_empty_lines(mock_logger):
     file_content = "shop   \n\n  my\nbest \nsuper\n  \n"
     with patch('builtins.open', mock_open(read_data=file_content)):
         result = read_list_from_file('data/domain_names.txt')
@@ -55,7 +102,7 @@ def test_concatenate_domains_with_full_stops():
     domain_names = ['shop.com', 'my.net']
     extensions = ['org', 'io']
     # Even if domain names contain full stops, concatenate should add another
-    concatenated = concatenate_domains(domain_names, extensions)
+    concatenated = list(concatenate_domains(domain_names, extensions))
     expected = [
         'shop.com.org',
         'shop.com.io',
@@ -68,7 +115,7 @@ def test_concatenate_domains_with_full_stops():
 def test_concatenate_domains_with_nonexistent_extensions():
     domain_names = ['shop', 'my']
     extensions = ['invalidext', 'anotherfake']
-    concatenated = concatenate_domains(domain_names, extensions)
+    concatenated = list(concatenate_domains(domain_names, extensions))
     expected = [
         'shop.invalidext',
         'shop.anotherfake',
@@ -81,7 +128,7 @@ def test_concatenate_domains_with_nonexistent_extensions():
 def test_load_dataframe_existing_file():
     csv_content = "domain\nshop.com\nmy.net"
     with patch('builtins.open', mock_open(read_data=csv_content)):
-        with patch('os.path.exists', return_value=True):
+        with patch('os.path.exists', return_value=True), patch('src.domain_checker.CSV_READ_ENGINE', 'c'):
             df = load_dataframe('data/available_domains.csv')
             assert len(df) == 2
             assert df.iloc[0]['domain'] == 'shop.com'
@@ -125,30 +172,19 @@ def test_is_domain_available_empty_domain_name(mock_whois):
     available = is_domain_available('emptydomain.com')
     assert available == True
 
-# 12. Test update_dataframes with available domain
-def test_update_dataframes_available(mock_whois, mock_logging):
+# 12. Test classify_domain with available domain
+def test_classify_domain_available(mock_whois, mock_logger):
     mock_whois.side_effect = whois.parser.PywhoisError
-    available_df = create_dataframe([])
-    unavailable_df = create_dataframe([])
-    updated_available, updated_unavailable = update_dataframes('available.com', available_df, unavailable_df)
-    assert len(updated_available) == 1
-    assert updated_available.iloc[0]['domain'] == 'available.com'
-    assert len(updated_unavailable) == 0
-    mock_logging.info.assert_called_with("Available: available.com")
-
-# 13. Test update_dataframes with unavailable domain
-def test_update_dataframes_unavailable(mock_whois, mock_logging):
+    assert classify_domain('available.com') == True
+    mock_logger.info.assert_called_with("Available: %s", "available.com")
+
+# 13. Test classify_domain with unavailable domain
+def test_classify_domain_unavailable(mock_whois, mock_logger):
     mock_response = MagicMock()
     mock_response.domain_name = ['unavailable.com']
     mock_whois.return_value = mock_response
-    available_df = create_dataframe([])
-    unavailable_df = create_dataframe([])
-    updated_available, updated_unavailable = update_dataframes('unavailable.com', available_df, unavailable_df)
-    assert len(updated_available) == 0
-    assert len(updated_unavailable) == 1  # Changed from unavailable_df to updated_unavailable
-    assert unavailable_df.empty  # Original unavailable_df should remain empty
-    assert updated_unavailable.iloc[0]['domain'] == 'unavailable.com'
-    mock_logging.info.assert_called_with("Unavailable: unavailable.com")
+    assert classify_domain('unavailable.com') == False
+    mock_logger.info.assert_called_with("Unavailable: %s", "unavailable.com")
 
 # 14. Test sort_and_save_dataframes with correct sorting
 def test_sort_and_save_dataframes():
@@ -212,7 +248,7 @@ def test_sort_and_save_dataframes_csv_missing():
         assert second_call_args[1] == unavailable_file
 
 # 16. Test read_list_from_file with file containing full stops in domain names
-def test_read_list_from_file_with_full_stops(mock_logging):
+def test_read_list_from_file_with_full_stops(mock_logger):
     file_content = "shop.\nmy.\nbest.\nsuper.\n"
     with patch('builtins.open', mock_open(read_data=file_content)):
         result = read_list_from_file('data/domain_names_with_dots.txt')
@@ -227,27 +263,19 @@ def test_is_domain_available_invalid_extension(mock_whois):
     available = is_domain_available('invalid.ext')
     assert available == False
 
-# 18. Test update_dataframes_with_retries
-def test_update_dataframes_with_retries(mock_whois, mock_logging):
+# 18. Test classify_domain_with_retries
+def test_classify_domain_with_retries(mock_whois, mock_logger):
     # Simulate transient errors followed by a successful response
     mock_whois.side_effect = [Exception("Temporary error"), whois.parser.PywhoisError]
     
-    available_df = create_dataframe([])
-    unavailable_df = create_dataframe([])
-    
-    # Update dataframes, which should handle retries
-    updated_available, updated_unavailable = update_dataframes('transient.com', available_df, unavailable_df)
-    
-    assert len(updated_available) == 1
-    assert updated_available.iloc[0]['domain'] == 'transient.com'
-    assert len(updated_unavailable) == 0
-    mock_logging.warning.assert_called_with(
-        "Error checking transient.com: Temporary error. Retrying in 2 seconds (Attempt 1/5)."
-    )
-    mock_logging.info.assert_called_with("Available: transient.com")
+    # Classify the domain, which should handle retries
+    assert classify_domain('transient.com') == True
+    args = mock_logger.warning.call_args.args
+    assert args[0] % args[1:] == "Error checking transient.com: Temporary error. Retrying in 2 seconds (Attempt 1/5)."
+    mock_logger.info.assert_called_with("Available: %s", "transient.com")
 
 # 19. Test read_list_from_file with different line endings
-def test_read_list_from_file_different_line_endings(mock_logging):
+def test_read_list_from_file_different_line_endings(mock_logger):
     # Unix and Windows line endings
     file_content = "shop\r\nmy\r\nbest\r\nsuper\r\n"
     with patch('builtins.open', mock_open(read_data=file_content)):
@@ -255,7 +283,7 @@ def test_read_list_from_file_different_line_endings(mock_logging):
         assert result == ['shop', 'my', 'best', 'super']
 
 # 20. Test handling domain extensions with trailing spaces
-def test_read_list_from_file_extensions_trailing_spaces(mock_logging):
+def test_read_list_from_file_extensions_trailing_spaces(mock_logger):
     file_content = "com \nnet\n org \nio\n"
     with patch('builtins.open', mock_open(read_data=file_content)):
         extensions = read_list_from_file('data/extensions_trailing_spaces.txt')
@@ -265,7 +293,7 @@ def test_read_list_from_file_extensions_trailing_spaces(mock_logging):
 def test_concatenate_domains_no_double_dots():
     domain_names = ['shop.', 'my', 'best', 'super.']
     extensions = ['com', 'net']
-    concatenated = concatenate_domains(domain_names, extensions)
+    concatenated = list(concatenate_domains(domain_names, extensions))
     expected = [
         'shop..com',
         'shop..net',
@@ -287,7 +315,7 @@ def test_is_domain_available_domain_name_list(mock_whois):
     assert available == False
 
 # 23. Test read_list_from_file with Unicode characters
-def test_read_list_from_file_unicode_characters(mock_logging):
+def test_read_list_from_file_unicode_characters(mock_logger):
     file_content = "shöp\nmý\nbést\nsüpër\n"
     with patch('builtins.open', mock_open(read_data=file_content)):
         result = read_list_from_file('data/domain_names_unicode.txt')
@@ -297,7 +325,458 @@ def test_read_list_from_file_unicode_characters(mock_logging):
 def test_concatenate_domains_large_list():
     domain_names = [f"domain{i}" for i in range(1000)]
     extensions = ['com', 'net']
-    concatenated = concatenate_domains(domain_names, extensions)
+    concatenated = list(concatenate_domains(domain_names, extensions))
     assert len(concatenated) == 2000
     assert concatenated[:2] == ['domain0.com', 'domain0.net']
-    assert concatenated[-2:] == ['domain999.com', 'domain999.net']
\ No newline at end of file
+    assert concatenated[-2:] == ['domain999.com', 'domain999.net']
+
+# 25. Test open_csv_for_append writes the header for a new file
+def test_open_csv_for_append_new_file(tmp_path):
+    file_path = tmp_path / 'available_domains.csv'
+    with open_csv_for_append(file_path) as file:
+        file.write('shop.com\n')
+    assert file_path.read_text() == f'domain{os.linesep}shop.com\n'
+
+# 26. Test open_csv_for_append appends to an existing file without a second header
+def test_open_csv_for_append_existing_file(tmp_path):
+    file_path = tmp_path / 'available_domains.csv'
+    create_dataframe(['shop.com']).to_csv(file_path, index=False)
+    with open_csv_for_append(file_path) as file:
+        file.write('my.net\n')
+    df = pd.read_csv(file_path)
+    assert list(df['domain']) == ['shop.com', 'my.net']
+
+# 27. Test get_tld_semaphore shares one semaphore per TLD
+def test_get_tld_semaphore():
+    assert get_tld_semaphore('shop.com') is get_tld_semaphore('my.com')
+    assert get_tld_semaphore('shop.com') is not get_tld_semaphore('shop.net')
+
+# 28. Test is_domain_available reuses cached results
+def test_is_domain_available_cached(mock_whois, tmp_path):
+    mock_whois.side_effect = whois.parser.PywhoisError
+    open_whois_cache(str(tmp_path / 'whois_cache.db'))
+    try:
+        assert is_domain_available('cached.com') == True
+        assert is_domain_available('cached.com') == True
+    finally:
+        close_whois_cache()
+    assert mock_whois.call_count == 1
+
+# 29. Test is_domain_available ignores expired cache entries
+def test_is_domain_available_cache_expired(mock_whois, tmp_path):
+    mock_whois.side_effect = whois.parser.PywhoisError
+    cache = open_whois_cache(str(tmp_path / 'whois_cache.db'))
+    try:
+        cache['expired.com'] = {'available': False, 'ts': 0}
+        assert is_domain_available('expired.com') == True
+        assert cache['expired.com']['available'] == True
+    finally:
+        close_whois_cache()
+
+# 30. Test is_domain_available gives up after max_attempts retries
+def test_is_domain_available_max_attempts(mock_whois, mock_logger):
+    mock_whois.side_effect = Exception("Persistent error")
+    with patch('src.domain_checker.time.sleep') as mock_sleep, \
+            patch('src.domain_checker.wait_for_rate_limit'):
+        available = is_domain_available('failing.com', max_attempts=7)
+    assert available == False
+    assert mock_whois.call_count == 8
+    assert [c.args[0] for c in mock_sleep.call_args_list] == [2, 4, 8, 16, 32, 60, 60]
+    mock_logger.error.assert_called_with("Failed to check %s after %d attempts.", "failing.com", 7)
+
+# 31. Test lookup_whois only asks for each extension's WHOIS server once
+def test_lookup_whois_caches_server():
+    with patch('src.domain_checker._whois_servers', {}), \
+            patch('src.domain_checker.whois.NICClient') as mock_client, \
+            patch('src.domain_checker.whois.WhoisEntry.load') as mock_load:
+        mock_client.return_value.choose_server.return_value = 'whois.verisign-grs.com'
+        mock_client.return_value.whois.return_value = 'Domain Name: SHOP.COM'
+        lookup_whois('shop.com')
+        lookup_whois('my.com')
+        mock_client.return_value.choose_server.assert_called_once_with('shop.com')
+        mock_client.return_value.whois.assert_called_with('my.com', 'whois.verisign-grs.com', 0, quiet=True)
+        mock_load.assert_called_with('my.com', 'Domain Name: SHOP.COM')
+
+# 32. Test wait_for_rate_limit only sleeps once the per-second budget is used
+def test_wait_for_rate_limit():
+    with patch('src.domain_checker._lookup_times', deque(maxlen=3)), \
+            patch('src.domain_checker.time.sleep') as mock_sleep:
+        for _ in range(3):
+            wait_for_rate_limit()
+        mock_sleep.assert_not_called()
+        wait_for_rate_limit()
+        mock_sleep.assert_called_once()
+        assert 0 < mock_sleep.call_args.args[0] <= 1.0
+
+# 33. Test load_dataframe with the pyarrow CSV engine
+def test_load_dataframe_pyarrow_engine(tmp_path):
+    pytest.importorskip('pyarrow')
+    file_path = tmp_path / 'available_domains.csv'
+    file_path.write_text("domain\nshop.com\nmy.net\n")
+    with patch('src.domain_checker.CSV_READ_ENGINE', 'pyarrow'):
+        df = load_dataframe(file_path)
+    assert list(df['domain']) == ['shop.com', 'my.net']
+
+# 34. Test open_processed_domains seeds an empty record from the CSV files
+def test_open_processed_domains_seeds_from_csv(tmp_path):
+    available_file = tmp_path / 'available_domains.csv'
+    unavailable_file = tmp_path / 'unavailable_domains.csv'
+    create_dataframe(['shop.com']).to_csv(available_file, index=False)
+    create_dataframe(['my.net']).to_csv(unavailable_file, index=False)
+    processed = open_processed_domains(str(tmp_path / 'processed.shelf'), available_file, unavailable_file)
+    try:
+        assert dict(processed) == {'shop.com': 'available', 'my.net': 'unavailable'}
+    finally:
+        processed.close()
+
+# 35. Test open_processed_domains starts over when both CSV files are missing
+def test_open_processed_domains_csv_missing(tmp_path):
+    processed_file = str(tmp_path / 'processed.shelf')
+    with shelve.open(processed_file) as processed:
+        processed['shop.com'] = 'available'
+    processed = open_processed_domains(
+        processed_file, tmp_path / 'available_domains.csv', tmp_path / 'unavailable_domains.csv'
+    )
+    try:
+        assert len(processed) == 0
+    finally:
+        processed.close()
+
+# 36. Test is_valid_domain with malformed domains
+def test_is_valid_domain_malformed():
+    assert is_valid_domain('shop.com') == True
+    assert is_valid_domain('shöp.com') == True
+    assert is_valid_domain('shop..com') == False
+    assert is_valid_domain('-shop.com') == False
+    assert is_valid_domain('shop') == False
+    assert is_valid_domain('sh op.com') == False
+
+# 37. Test is_valid_domain rejects TLDs missing from the loaded TLD list
+def test_is_valid_domain_unknown_tld():
+    with patch('src.domain_checker._valid_tlds', frozenset(['com', 'net'])):
+        assert is_valid_domain('shop.com') == True
+        assert is_valid_domain('shop.invalidext') == False
+
+# 38. Test is_domain_available skips the lookup for invalid domains
+def test_is_domain_available_invalid_domain(mock_whois, mock_logger):
+    available = is_domain_available('shop..com')
+    assert available == False
+    mock_whois.assert_not_called()
+    mock_logger.warning.assert_called_with("Invalid domain: %s", "shop..com")
+
+# 39. Test load_valid_tlds reads an existing IANA TLD list
+def test_load_valid_tlds_existing_file(tmp_path):
+    file_path = tmp_path / 'tlds-alpha-by-domain.txt'
+    file_path.write_text("# Version 2024101500, Last Updated Tue Oct 15 07:07:01 2024 UTC\nCOM\nNET\n")
+    with patch('src.domain_checker._valid_tlds', None), patch('src.domain_checker.requests.get') as mock_get:
+        load_valid_tlds(file_path)
+        mock_get.assert_not_called()
+        assert is_valid_domain('shop.net') == True
+        assert is_valid_domain('shop.org') == False
+
+# 40. Test filter_unprocessed skips processed domains
+def test_filter_unprocessed():
+    processed = {'shop.com': 'available', 'my.net': 'unavailable'}
+    result = list(filter_unprocessed(['shop.com', 'shop.net', 'my.com', 'my.net'], processed))
+    assert result == ['shop.net', 'my.com']
+
+# 41. Test filter_unprocessed checks candidates directly against the processed shelf
+def test_filter_unprocessed_shelf(tmp_path):
+    with shelve.open(str(tmp_path / 'processed.shelf')) as processed:
+        processed['shop.com'] = 'available'
+        candidates = ['shop.com', 'shop.net']
+        assert list(filter_unprocessed(candidates, processed)) == ['shop.net']
+        assert list(filter_unprocessed(candidates, processed)) == ['shop.net']
+
+# 42. Test lookup_whois raises on socket errors so the lookup is retried
+def test_lookup_whois_socket_error():
+    with patch('src.domain_checker._whois_servers', {'com': 'whois.verisign-grs.com'}), \
+            patch('src.domain_checker.whois.NICClient') as mock_client:
+        mock_client.return_value.whois.return_value = 'Socket not responding: timed out'
+        with pytest.raises(ConnectionError):
+            lookup_whois('shop.com')
+
+# 43. Test is_domain_available_bulk with bulk API results
+def test_is_domain_available_bulk(mock_whois):
+    submit = MagicMock()
+    submit.json.return_value = {'requestId': 'abc'}
+    records = MagicMock()
+    records.json.return_value = {
+        'recordsLeft': 0,
+        'whoisRecords': [
+            {'domainName': 'taken.com', 'whoisRecord': {'domainName': 'taken.com'}},
+            {'domainName': 'free.com', 'whoisRecord': {'dataError': 'MISSING_WHOIS_DATA'}},
+            {'domainName': 'pending.com'},
+        ]
+    }
+    with patch('src.domain_checker.requests.post', side_effect=[submit, records]) as mock_post, \
+            patch('src.domain_checker.time.sleep'):
+        result = is_domain_available_bulk(['taken.com', 'free.com', 'pending.com', 'shop..com'], 'key')
+    # The domain the API did not answer is left for an individual lookup
+    assert result == [False, True, None, False]
+    assert mock_post.call_args_list[0].kwargs['json']['domains'] == ['taken.com', 'free.com', 'pending.com']
+    mock_whois.assert_not_called()
+
+# 44. Test is_domain_available_bulk leaves every domain unanswered when the API fails
+def test_is_domain_available_bulk_request_failed(mock_whois, mock_logger):
+    with patch('src.domain_checker.requests.post', side_effect=requests.ConnectionError("down")):
+        result = is_domain_available_bulk(['free.com', 'other.net'], 'key')
+    assert result == [None, None]
+    mock_whois.assert_not_called()
+
+# 45. Test concatenate_domains builds domains lazily
+def test_concatenate_domains_is_lazy():
+    domains = concatenate_domains(['shop', 'my'], ['com', 'net'])
+    assert next(domains) == 'shop.com'
+    assert list(domains) == ['shop.net', 'my.com', 'my.net']
+
+# 46. Test chunked splits an iterable into lists
+def test_chunked():
+    assert list(chunked(iter(range(5)), 2)) == [[0, 1], [2, 3], [4]]
+    assert list(chunked([], 2)) == []
+
+# 47. Test classify_domains yields results in input order with a bounded window
+def test_classify_domains(mock_whois):
+    mock_whois.side_effect = lambda domain: MagicMock(domain_name=None if domain.endswith('.net') else domain)
+    with ThreadPoolExecutor(max_workers=4) as executor, patch('src.domain_checker.wait_for_rate_limit'):
+        results = list(classify_domains(concatenate_domains(['shop', 'my'], ['com', 'net']), executor, 3))
+    assert results == [('shop.com', False), ('shop.net', True), ('my.com', False), ('my.net', True)]
+
+# 48. Test classify_domains submits no more than window_size domains ahead of the results
+def test_classify_domains_window_size():
+    release = threading.Event()
+    started = []
+    def fake_classify(domain):
+        started.append(domain)
+        if domain == 'slow.com':
+            release.wait(5)
+        return True
+    domains = ['slow.com'] + [f'fast{i}.com' for i in range(10)]
+    with ThreadPoolExecutor(max_workers=4) as executor, \
+            patch('src.domain_checker.classify_domain', side_effect=fake_classify):
+        results = classify_domains(iter(domains), executor, 3)
+        first = executor.submit(next, results)
+        time.sleep(0.2)
+        # The oldest lookup is still running, so only the window has been submitted
+        assert not first.done()
+        assert sorted(started) == sorted(domains[:3])
+        release.set()
+        assert first.result(timeout=5) == ('slow.com', True)
+        assert [d for d, _ in results] == domains[1:]
+
+# 49. Test is_domain_available does not cache failed lookups
+def test_is_domain_available_failure_not_cached(mock_whois, tmp_path):
+    mock_whois.side_effect = Exception("Network down")
+    cache = open_whois_cache(str(tmp_path / 'whois_cache.db'))
+    try:
+        with patch('src.domain_checker.time.sleep'), patch('src.domain_checker.wait_for_rate_limit'):
+            assert is_domain_available('outage.com', max_attempts=1) == False
+        assert 'outage.com' not in cache
+        mock_whois.side_effect = whois.parser.PywhoisError
+        assert is_domain_available('outage.com') == True
+    finally:
+        close_whois_cache()
+
+# 50. Test classify_domains_bulk checks unanswered domains on the executor
+def test_classify_domains_bulk_fallback(mock_logger):
+    executor = MagicMock()
+    executor.map.side_effect = lambda func, domains: [True for _ in domains]
+    with patch('src.domain_checker.is_domain_available_bulk', return_value=[False, None, None]):
+        results = list(classify_domains_bulk(iter(['taken.com', 'free.com', 'free.net']), 'key', executor))
+    assert results == [('taken.com', False), ('free.com', True), ('free.net', True)]
+    executor.map.assert_called_once()
+    assert executor.map.call_args.args[1] == ['free.com', 'free.net']
+
+# 51. Test get_whois_server does not block other extensions while resolving
+def test_get_whois_server_resolves_without_lock():
+    release = threading.Event()
+    def choose_server(domain):
+        if domain.endswith('.slow'):
+            release.wait(5)
+        return f'whois.nic.{domain.rsplit(".", 1)[-1]}'
+    with patch('src.domain_checker._whois_servers', {}), \
+            patch('src.domain_checker.whois.NICClient') as mock_client, \
+            ThreadPoolExecutor(max_workers=2) as executor:
+        mock_client.return_value.choose_server.side_effect = choose_server
+        slow = executor.submit(get_whois_server, 'shop.slow')
+        assert executor.submit(get_whois_server, 'shop.com').result(timeout=1) == 'whois.nic.com'
+        release.set()
+        assert slow.result(timeout=5) == 'whois.nic.slow'
+
+# 52. Test finalize_csv_files sorts and dedupes files left by an interrupted run
+def test_finalize_csv_files_unsorted(tmp_path):
+    available_file = tmp_path / 'available_domains.csv'
+    unavailable_file = tmp_path / 'unavailable_domains.csv'
+    create_dataframe(['zeta.com', 'alpha.com', 'zeta.com']).to_csv(available_file, index=False)
+    create_dataframe(['beta.com']).to_csv(unavailable_file, index=False)
+    assert finalize_csv_files(available_file, unavailable_file, only_if_needed=True) == True
+    assert list(pd.read_csv(available_file)['domain']) == ['alpha.com', 'zeta.com']
+
+# 53. Test finalize_csv_files leaves sorted files untouched when only_if_needed is set
+def test_finalize_csv_files_already_sorted(tmp_path):
+    available_file = tmp_path / 'available_domains.csv'
+    unavailable_file = tmp_path / 'unavailable_domains.csv'
+    create_dataframe(['alpha.com', 'zeta.com']).to_csv(available_file, index=False)
+    with patch('src.domain_checker.save_dataframe') as mock_save:
+        assert finalize_csv_files(available_file, unavailable_file, only_if_needed=True) == False
+        mock_save.assert_not_called()
+
+# 54. Test open_processed_domains rebuilds the record when one CSV file is missing
+def test_open_processed_domains_one_csv_missing(tmp_path):
+    processed_file = str(tmp_path / 'processed.shelf')
+    available_file = tmp_path / 'available_domains.csv'
+    unavailable_file = tmp_path / 'unavailable_domains.csv'
+    create_dataframe(['my.net']).to_csv(unavailable_file, index=False)
+    with shelve.open(processed_file) as processed:
+        processed['shop.com'] = 'available'
+        processed['my.net'] = 'unavailable'
+    processed = open_processed_domains(processed_file, available_file, unavailable_file)
+    try:
+        assert dict(processed) == {'my.net': 'unavailable'}
+    finally:
+        processed.close()
+
+# 55. Test main on a fresh checkout writes sorted CSV files and records every domain
+def test_main_fresh_run(data_dir, mock_whois):
+    main()
+    assert read_domains(data_dir / 'available_domains.csv') == ['shop.com']
+    assert read_domains(data_dir / 'unavailable_domains.csv') == ['my.com', 'my.net', 'shop.net']
+    assert mock_whois.call_count == 4
+    with shelve.open(str(data_dir / 'processed.shelf')) as processed:
+        assert dict(processed) == {
+            'shop.com': 'available', 'shop.net': 'unavailable', 'my.com': 'unavailable', 'my.net': 'unavailable'
+        }
+
+# 56. Test main resumes by checking only domains it has not processed yet
+def test_main_resume(data_dir, mock_whois, mock_logger):
+    main()
+    mock_whois.reset_mock()
+    (data_dir / 'domain_names.txt').write_text("shop\nmy\nshopnow\n")
+    main()
+    assert sorted(call.args[0] for call in mock_whois.call_args_list) == ['shopnow.com', 'shopnow.net']
+    assert read_domains(data_dir / 'available_domains.csv') == ['shop.com', 'shopnow.com']
+    assert read_domains(data_dir / 'unavailable_domains.csv') == ['my.com', 'my.net', 'shop.net', 'shopnow.net']
+    mock_whois.reset_mock()
+    main()
+    mock_whois.assert_not_called()
+    mock_logger.info.assert_any_call("All domains have already been checked.")
+
+# 57. Test main records the domains written before an interruption and picks up after them
+def test_main_interrupted(data_dir, mock_whois):
+    names = [f"shop{i:03d}" for i in range(120)]
+    (data_dir / 'domain_names.txt').write_text("\n".join(names) + "\n")
+    (data_dir / 'extensions.txt').write_text("com\n")
+    fake_whois = mock_whois.side_effect
+    def interrupt(domain):
+        if domain == 'shop075.com':
+            raise KeyboardInterrupt
+        return fake_whois(domain)
+    mock_whois.side_effect = interrupt
+    with pytest.raises(KeyboardInterrupt):
+        main()
+    # 50 domains were recorded at the flush, and the 25 after it on the way out
+    written = [f"{name}.com" for name in names[:75]]
+    assert read_domains(data_dir / 'available_domains.csv') == written
+    with shelve.open(str(data_dir / 'processed.shelf')) as processed:
+        assert sorted(processed) == written
+    mock_whois.reset_mock()
+    mock_whois.side_effect = fake_whois
+    main()
+    assert not {call.args[0] for call in mock_whois.call_args_list} & set(written)
+    assert read_domains(data_dir / 'available_domains.csv') == [f"{name}.com" for name in names]
+
+# 58. Test main checks domains again after their CSV file is deleted
+def test_main_csv_deleted(data_dir, mock_whois):
+    main()
+    os.remove(data_dir / 'available_domains.csv')
+    main()
+    assert read_domains(data_dir / 'available_domains.csv') == ['shop.com']
+    assert read_domains(data_dir / 'unavailable_domains.csv') == ['my.com', 'my.net', 'shop.net']
+
+# 59. Test main sorts and dedupes the CSV files when there is nothing left to check
+def test_main_nothing_to_check_finalizes(data_dir, mock_whois):
+    main()
+    (data_dir / 'unavailable_domains.csv').write_text("domain\nshop.net\nmy.com\nmy.net\nmy.com\n")
+    mock_whois.reset_mock()
+    main()
+    mock_whois.assert_not_called()
+    assert read_domains(data_dir / 'unavailable_domains.csv') == ['my.com', 'my.net', 'shop.net']
+
+# 60. Test main uses the bulk WHOIS API when an API key is set
+def test_main_bulk_api(data_dir, mock_whois, monkeypatch):
+    monkeypatch.setenv('WHOISXML_API_KEY', 'key')
+    with patch('src.domain_checker.is_domain_available_bulk') as mock_bulk:
+        mock_bulk.side_effect = lambda domains, api_key: [d == 'my.net' for d in domains]
+        main()
+    mock_bulk.assert_called_once_with(['shop.com', 'shop.net', 'my.com', 'my.net'], 'key')
+    mock_whois.assert_not_called()
+    assert read_domains(data_dir / 'available_domains.csv') == ['my.net']
+    assert read_domains(data_dir / 'unavailable_domains.csv') == ['my.com', 'shop.com', 'shop.net']
+
+# 61. Test lookup_whois raises on empty responses so the lookup is retried
+def test_lookup_whois_empty_response():
+    with patch('src.domain_checker._whois_servers', {'com': 'whois.verisign-grs.com'}), \
+            patch('src.domain_checker.whois.NICClient') as mock_client:
+        mock_client.return_value.whois.return_value = '\r\n'
+        with pytest.raises(ConnectionError):
+            lookup_whois('shop.com')
+
+# 62. Test load_valid_tlds downloads the TLD list again once it is older than TLD_LIST_MAX_AGE
+def test_load_valid_tlds_stale_file(tmp_path):
+    file_path = tmp_path / 'tlds-alpha-by-domain.txt'
+    file_path.write_text("# Version 2024101500, Last Updated Tue Oct 15 07:07:01 2024 UTC\nCOM\n")
+    old = time.time() - 8 * 86400
+    os.utime(file_path, (old, old))
+    with patch('src.domain_checker._valid_tlds', None), patch('src.domain_checker.requests.get') as mock_get:
+        mock_get.return_value.text = "# Version 2026101500, Last Updated Thu Oct 15 07:07:01 2026 UTC\nCOM\nNEWTLD\n"
+        load_valid_tlds(file_path)
+        assert is_valid_domain('shop.newtld') == True
+    assert 'NEWTLD' in file_path.read_text()
+
+# 63. Test load_valid_tlds ignores a download that is not the TLD list and keeps the existing file
+def test_load_valid_tlds_unexpected_download(tmp_path, mock_logger):
+    file_path = tmp_path / 'tlds-alpha-by-domain.txt'
+    file_path.write_text("# Version 2024101500, Last Updated Tue Oct 15 07:07:01 2024 UTC\nCOM\n")
+    old = time.time() - 8 * 86400
+    os.utime(file_path, (old, old))
+    with patch('src.domain_checker._valid_tlds', None), patch('src.domain_checker.requests.get') as mock_get:
+        mock_get.return_value.text = "<html><body>Sign in to continue</body></html>"
+        load_valid_tlds(file_path)
+        assert is_valid_domain('shop.com') == True
+        assert is_valid_domain('shop.org') == False
+    mock_logger.warning.assert_called_with("Downloaded TLD list is not in the expected format. Ignoring it.")
+
+# 64. Test load_valid_tlds falls back to syntax-only validation when the file is not the TLD list
+def test_load_valid_tlds_invalid_file(tmp_path, mock_logger):
+    file_path = tmp_path / 'tlds-alpha-by-domain.txt'
+    file_path.write_text("<html><body>Sign in to continue</body></html>\n")
+    with patch('src.domain_checker._valid_tlds', frozenset(['com'])), patch('src.domain_checker.requests.get') as mock_get:
+        load_valid_tlds(file_path)
+        mock_get.assert_not_called()
+        assert is_valid_domain('shop.org') == True
+    mock_logger.warning.assert_called_with(
+        "TLD list %s is not in the expected format. Skipping TLD validation.", file_path
+    )
+
+# 65. Test is_domain_available_bulk skips records without a name and shares cache entries across case
+def test_is_domain_available_bulk_cache_keys(mock_whois, tmp_path):
+    submit = MagicMock()
+    submit.json.return_value = {'requestId': 'abc'}
+    records = MagicMock()
+    records.json.return_value = {
+        'recordsLeft': 0,
+        'whoisRecords': [
+            {'whoisRecord': {'domainName': 'broken.com'}},
+            {'domainName': 'free.com', 'whoisRecord': {'dataError': 'MISSING_WHOIS_DATA'}},
+        ]
+    }
+    open_whois_cache(str(tmp_path / 'whois_cache.db'))
+    try:
+        with patch('src.domain_checker.requests.post', side_effect=[submit, records]), \
+                patch('src.domain_checker.time.sleep'):
+            assert is_domain_available_bulk(['Free.com', 'broken.com'], 'key') == [True, None]
+        # The per-domain path reads the entry the bulk path stored
+        assert is_domain_available('FREE.COM') == True
+        mock_whois.assert_not_called()
+    finally:
+        close_whois_cache()